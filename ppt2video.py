@@ -1,14 +1,35 @@
 import argparse
+import hashlib
 import os
 import re
+import shutil
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from tempfile import mkdtemp
+from xml.sax.saxutils import escape
+import pythoncom
+import pywintypes
 import win32com.client as win32
 
 # Make full path from relative path for command line arguments
 def ensure_full_path(s):
     return os.path.abspath(s) if not os.path.isabs(s) else s
 
+# Integer command line arguments that must be at least 1 or at least 0
+def positive_int(s):
+    value = int(s)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def non_negative_int(s):
+    value = int(s)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be at least 0, got {value}")
+    return value
+
 # Parse command line arguments
 parser = argparse.ArgumentParser(description='Convert PowerPoint presentation to video presentation with synthesized audio.')
 parser.add_argument('pptfile', help='PowerPoint file to create presentation video for', type=ensure_full_path)
@@ -23,8 +44,12 @@ parser.add_argument('--api', default='Azure', choices=['SAPI', 'Azure'], help='A
 parser.add_argument('--update', type=ensure_full_path, help='Folder with temporary files from previous conversion to reuse when only a subset of the slides were updated; should be used together with --slides, must use the same file extension for the output file (i.e., the same video container format) as the previous conversion, and the slide order and count must be the same as in the previous conversion')
 parser.add_argument('--quit_ppt', action='store_true', help='Quit PowerPoint after processing the presentation, if no other presentations are open')
 parser.add_argument('--skip_image', action='store_true', help='Skip image extraction and use existing image files in the temporary folder; must be combined with --update')
+parser.add_argument('--reexport_images', action='store_true', help='Export slide images again even if they already exist in the --update folder; by default, only missing slide images are exported when updating')
 parser.add_argument('--skip_audio', action='store_true', help='Skip audio synthesis and use existing audio files in the temporary folder; must be combined with --update')
 parser.add_argument('--poster_slide', type=int, default=1, help='Slide number to use as poster slide for the video (first slide by default)')
+parser.add_argument('--video_encoder', default='libx264', choices=['libx264', 'h264_nvenc', 'h264_qsv', 'h264_amf', 'hevc_nvenc'], help='ffmpeg encoder for the slide videos: libx264 (default; software encoding) or a hardware encoder for NVIDIA (h264_nvenc, hevc_nvenc), Intel (h264_qsv) or AMD (h264_amf) GPUs; at most --concurrency slide videos are encoded at the same time, so keep it within the number of parallel encoding sessions your GPU allows (limited on consumer NVIDIA GPUs)', type=str)
+parser.add_argument('--concurrency', type=positive_int, default=4, help='Number of slides to synthesize and encode in parallel; default: 4')
+parser.add_argument('--retries', type=non_negative_int, default=3, help='Number of times to retry Azure speech synthesis with exponential backoff when requests are throttled; default: 3')
 args = parser.parse_args()
 
 # import API
@@ -41,12 +66,32 @@ if args.pronunciation_mapping:
             word, pronunciation = line.strip().split('=')
             pronunciation_mapping[word.lower().strip()] = pronunciation.lower().strip()
 
+# Compile all mapped words into a single pattern, so each slide text is scanned only once;
+# longer words come first so they take precedence over words that are their prefix.
+# Each word gets its own group, as the matched text does not always lower-case to the word
+# (e.g., 'ſ' matches 's' when ignoring case)
+pronunciation_words = sorted(pronunciation_mapping, key=len, reverse=True)
+pronunciation_pattern = None
+if pronunciation_mapping:
+    pronunciation_pattern = re.compile(r'\b(?:' + '|'.join(f'({re.escape(word)})' for word in pronunciation_words) + r')\b', re.IGNORECASE)
+
 # Init Azure Speech SDK
 if args.api == 'Azure' and not args.skip_audio:
     speech_config = speechsdk.SpeechConfig(
         subscription=os.environ.get('SPEECH_KEY'), 
         region=os.environ.get('SPEECH_REGION'))
     speech_config.speech_synthesis_voice_name = args.voice
+    # Request compressed audio at the 24 kHz sample rate of the neural voices, so it can be copied into the slide video without re-encoding
+    speech_config.set_speech_synthesis_output_format(speechsdk.SpeechSynthesisOutputFormat.Audio24Khz96KBitRateMonoMp3)
+
+# Encoder options for slide videos
+video_encoder_options = ['-c:v', args.video_encoder]
+if args.video_encoder == 'libx264':
+    video_encoder_options += ['-tune', 'stillimage']
+elif args.video_encoder.endswith('_nvenc'):
+    video_encoder_options += ['-preset', 'fast', '-rc', 'constqp', '-qp', '23']
+# Settings slide videos are created with, compared when updating to decide whether slide videos can be reused
+video_settings = f"{args.video_encoder} {args.video_width}x{args.video_height}"
 
 # Determine video container format from output file extension
 container_format = os.path.splitext(args.output)[1][1:]
@@ -56,9 +101,8 @@ temp_dir = args.update if args.update else mkdtemp()
 slide_folder = os.path.join(temp_dir, "slides")
 audio_folder = os.path.join(temp_dir, "audio")
 video_folder = os.path.join(temp_dir, "video")
-if not args.update:
-    for dir in [slide_folder, audio_folder, video_folder]:
-        os.mkdir(dir)
+for dir in [slide_folder, audio_folder, video_folder]:
+    os.makedirs(dir, exist_ok=True)
 
 # Open PowerPoint file, will be needed to extract slide images and notes
 ppt = win32.Dispatch("PowerPoint.Application")
@@ -76,88 +120,306 @@ else:
             slide_list.extend(range(int(start), int(end) + 1))
         else:
             slide_list.append(int(i))
-    slide_list = sorted(slide_list)
+    # Slides listed more than once would be processed concurrently, writing to the same files
+    slide_list = sorted(set(slide_list))
 
-# Generate silence file
-print(f"Generating {args.silence} seconds silence audio file")
-silence_file = os.path.join(temp_dir, "silence.wav")
-subprocess.run(f'ffmpeg -y -hide_banner -loglevel error -f lavfi -i anullsrc=r=11025:cl=mono -t {args.silence} -c:a pcm_s16le {silence_file}', shell=True)
-    
 # remember created slide videos for ffmpeg concat later
 slide_videos = []
 total_chars = 0
 
-# Loop over slides in presentation
+# Export slide images; the PowerPoint COM objects must only be used from this thread
+export_list = []
+if not args.skip_image:
+    # When updating a previous conversion, keep existing slide images unless asked to export them again
+    export_list = [slide_number for slide_number in slide_list
+                   if args.reexport_images or not args.update or not os.path.exists(os.path.join(slide_folder, f"slide_{slide_number}.png"))]
+    export_all = set(export_list) == set(range(1, presentation.Slides.Count + 1))
+    if export_all:
+        # Export whole presentation in a single call
+        print("Exporting all slides as images")
+        export_folder = mkdtemp(dir=temp_dir)
+        presentation.Export(export_folder, "PNG", args.video_width, args.video_height)
+        # File names depend on the language of PowerPoint (e.g., Slide1.PNG or Folie1.PNG), so only rely on the slide number
+        exported_files = {}
+        for name in os.listdir(export_folder):
+            match = re.search(r'(\d+)\.png$', name, re.IGNORECASE)
+            if match:
+                exported_files[int(match.group(1))] = os.path.join(export_folder, name)
+        if sorted(exported_files) == list(range(1, presentation.Slides.Count + 1)):
+            for slide_number, exported_file in exported_files.items():
+                os.replace(exported_file, os.path.join(slide_folder, f"slide_{slide_number}.png"))
+        else:
+            print("Unexpected names of exported slide images, exporting slides one by one")
+            export_all = False
+        shutil.rmtree(export_folder)
+    if not export_all:
+        for slide_number in export_list:
+            print(f"Exporting slide {slide_number} as image")
+            slide_image_file = os.path.join(slide_folder, f"slide_{slide_number}.png")
+            if os.path.exists(slide_image_file):
+                os.remove(slide_image_file)
+            presentation.Slides(slide_number).Export(slide_image_file, "PNG", ScaleWidth=args.video_width, ScaleHeight=args.video_height)
+
+# Read slide notes up front
+slide_texts = {}
 for slide_number in slide_list:
-    print(f"Processing slide {slide_number}")
+    print(f"Preparing slide {slide_number}")
     slide = presentation.Slides(slide_number)
-    audio_file = os.path.join(audio_folder, f"audio_{slide_number}.wav")
-    audio_file_padded = audio_file.replace('.wav', '.m4a')
-
-    # Export slide as image
-    if not args.skip_image:
-        print(f"  Exporting slide {slide_number} as image")
-        slide_image_file = os.path.join(slide_folder, f"slide_{slide_number}.png")
-        if os.path.exists(slide_image_file):
-            os.remove(slide_image_file)
-        slide.Export(slide_image_file, "PNG", ScaleWidth=args.video_width, ScaleHeight=args.video_height)
 
     # Read slide text
+    slide_text = None
     if not args.skip_audio:
-        slide_text = slide.NotesPage.Shapes.Placeholders(2).TextFrame.TextRange.Text    
+        slide_text = slide.NotesPage.Shapes.Placeholders(2).TextFrame.TextRange.Text
         if not slide_text or len(slide_text.strip()) == 0:
             print(f"  Skipping slide {slide_number} because no note text found")
             continue
-        
+
         # Remove newlines and carriage returns
         slide_text = slide_text.replace('\n', ' ').replace('\r', ' ').strip()
-        
+
         # Replace words with pronunciation from mapping file
-        for word, pronunciation in pronunciation_mapping.items():
-            slide_text = re.sub(rf'\b{re.escape(word)}\b', pronunciation, slide_text, flags=re.IGNORECASE)
-        
-        total_chars += len(slide_text)
-    
+        if pronunciation_pattern:
+            slide_text = pronunciation_pattern.sub(lambda m: pronunciation_mapping[pronunciation_words[m.lastindex - 1]], slide_text)
+
+    slide_texts[slide_number] = slide_text
+
+# Close PowerPoint, it is not needed for speech synthesis and video creation
+presentation.Close()
+
+# If no open presentations remaining - quit PowerPoint
+try:
+    if args.quit_ppt and ppt.Presentations.Count == 0:
+        ppt.Quit()
+except pywintypes.com_error as e:
+    print(f"Could not quit PowerPoint: {e}")
+
+# ffmpeg processes creating slide videos as (slide number, watcher, file written by ffmpeg, slide video file,
+# hash of audio, whether audio was synthesized) tuples, waited for before concatenating the slide videos
+pending = []
+
+# Limit number of ffmpeg processes creating slide videos at the same time
+encoder_slots = threading.Semaphore(args.concurrency)
+encoder_watchers = ThreadPoolExecutor(max_workers=args.concurrency)
+
+# Wait for ffmpeg process to exit and free its slot; the error output is read while waiting,
+# so ffmpeg cannot block on a full pipe; returns exit code and error output
+def watch_encoder(process):
+    error = process.stderr.read()
+    process.wait()
+    encoder_slots.release()
+    return process.returncode, error.decode(errors='replace').strip()
+
+# Print why Azure speech synthesis was canceled
+def print_cancellation_details(cancellation_details):
+    print(f"  Speech synthesis canceled: {cancellation_details.reason}")
+    if cancellation_details.reason == speechsdk.CancellationReason.Error:
+        if cancellation_details.error_details:
+            print(f"  Error details: {cancellation_details.error_details}. Did you set the speech resource key and region values?")
+
+# Start Azure speech synthesis, retrying with exponential backoff when the service throttles requests
+def start_speaking(speech_synthesizer, ssml):
+    for attempt in range(args.retries + 1):
+        speech_synthesis_result = speech_synthesizer.start_speaking_ssml_async(ssml).get()
+        if speech_synthesis_result.reason != speechsdk.ResultReason.Canceled or attempt == args.retries:
+            break
+        if speech_synthesis_result.cancellation_details.error_code not in (speechsdk.CancellationErrorCode.TooManyRequests, speechsdk.CancellationErrorCode.ServiceUnavailable):
+            break
+        delay = 2 ** attempt
+        print(f"  Speech synthesis throttled, retrying in {delay} seconds")
+        time.sleep(delay)
+    return speech_synthesis_result
+
+# Hash file of a slide stores the hash of the text its audio was synthesized from and,
+# once its video was created, the video settings used
+def read_hash_file(hash_file):
+    with open(hash_file, 'r') as f:
+        audio_hash, _, previous_video_settings = f.read().partition('\n')
+    return audio_hash, previous_video_settings
+
+def write_hash_file(hash_file, audio_hash, video_settings=''):
+    with open(hash_file, 'w') as f:
+        f.write(f"{audio_hash}\n{video_settings}")
+
+# Speech synthesizer and SAPI voice of each worker thread, reused for all slides the thread processes
+worker = threading.local()
+
+# Synthesize audio and start creating video for a single slide; runs in a worker thread,
+# returns the slide video file or None if speech synthesis failed
+def process_slide(slide_number, slide_text):
+    print(f"Processing slide {slide_number}")
+    slide_image_file = os.path.join(slide_folder, f"slide_{slide_number}.png")
+    audio_file = os.path.join(audio_folder, f"audio_{slide_number}.{'mp3' if args.api == 'Azure' else 'wav'}")
+    video_file = os.path.join(video_folder, f"video_{slide_number}.{container_format}")
+    # ffmpeg writes to a temporary file that replaces the slide video once complete,
+    # so a failed run never leaves a truncated slide video for --update to reuse
+    partial_video_file = os.path.join(video_folder, f"video_{slide_number}.partial.{container_format}")
+    hash_file = os.path.join(audio_folder, f"audio_{slide_number}.hash")
+
+    audio_hash = None
+    synthesize = not args.skip_audio
+    if not args.skip_audio:
+        audio_hash = hashlib.blake2b(f"{args.api}\n{args.voice}\n{args.silence}\n{slide_text}".encode(), digest_size=16).hexdigest()
+        # When updating a previous conversion, reuse audio synthesized from the same text
+        if args.update and os.path.exists(audio_file) and os.path.exists(hash_file):
+            previous_audio_hash, previous_video_settings = read_hash_file(hash_file)
+            if previous_audio_hash == audio_hash:
+                # Slide video can be reused as well, unless the slide image was exported again or the video settings changed
+                if slide_number not in export_list and previous_video_settings == video_settings and os.path.exists(video_file):
+                    print(f"  Reusing video of slide {slide_number}, slide text is unchanged")
+                    return video_file
+                print(f"  Reusing audio of slide {slide_number}, slide text is unchanged")
+                synthesize = False
+    elif os.path.exists(hash_file):
+        # Existing audio is used as is, so its hash is still valid
+        audio_hash, _ = read_hash_file(hash_file)
+
+    # Update hash file before overwriting audio or video, so a failed or canceled run cannot leave
+    # a hash that does not match the files; the video settings are added once the video was created
+    if synthesize:
+        if os.path.exists(hash_file):
+            os.remove(hash_file)
+    elif audio_hash:
+        write_hash_file(hash_file, audio_hash)
+
+    # Azure audio stream to pipe into ffmpeg while it is being synthesized
+    audio_stream = None
+    if synthesize:
         # Synthesize audio for slide text
-        print(f"  Synthesizing audio of slide {slide_number}")    
-        if args.api == 'Azure': 
-            audio_config = speechsdk.audio.AudioOutputConfig(filename=audio_file)
-            speech_synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=audio_config)
-            speech_synthesis_result = speech_synthesizer.speak_text_async(slide_text).get()
-            if speech_synthesis_result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                pass
-            elif speech_synthesis_result.reason == speechsdk.ResultReason.Canceled:
-                cancellation_details = speech_synthesis_result.cancellation_details
-                print(f"  Speech synthesis canceled: {cancellation_details.reason}")
-                if cancellation_details.reason == speechsdk.CancellationReason.Error:
-                    if cancellation_details.error_details:
-                        print(f"  Error details: {cancellation_details.error_details}. Did you set the speech resource key and region values?")
-                break
+        print(f"  Synthesizing audio of slide {slide_number}")
+        if args.api == 'Azure':
+            # Pad audio with silence in front and back using SSML breaks
+            silence = f'<break time="{int(args.silence * 1000)}ms"/>'
+            language = '-'.join(args.voice.split('-')[:2])
+            ssml = f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="{language}"><voice name="{args.voice}">{silence}{escape(slide_text)}{silence}</voice></speak>'
+            # Reusing the synthesizer keeps its connection to the service open
+            if not hasattr(worker, 'speech_synthesizer'):
+                worker.speech_synthesizer = speechsdk.SpeechSynthesizer(speech_config=speech_config, audio_config=None)
+                # Open the connection up front for synthesis, instead of on the first request
+                worker.connection = speechsdk.Connection.from_speech_synthesizer(worker.speech_synthesizer)
+                worker.connection.open(True)
+            speech_synthesis_result = start_speaking(worker.speech_synthesizer, ssml)
+            if speech_synthesis_result.reason == speechsdk.ResultReason.Canceled:
+                print_cancellation_details(speech_synthesis_result.cancellation_details)
+                return None
+            audio_stream = speechsdk.AudioDataStream(speech_synthesis_result)
         else: # SAPI
-            sapi = win32.Dispatch("SAPI.SpVoice")
-            sapi.Voice = sapi.GetVoices().Item(int(args.voice))
+            if not hasattr(worker, 'sapi'):
+                # SAPI is a COM API, so COM must be initialized in each worker thread
+                pythoncom.CoInitialize()
+                worker.sapi = win32.Dispatch("SAPI.SpVoice")
+                worker.sapi.Voice = worker.sapi.GetVoices().Item(int(args.voice))
             outfile = win32.Dispatch("SAPI.SpFileStream")
             outfile.Open(audio_file, 3, False)
-            sapi.AudioOutputStream = outfile
-            sapi.Speak(slide_text)
+            worker.sapi.AudioOutputStream = outfile
+            worker.sapi.Speak(slide_text)
             outfile.Close()
-    
-        # Extend audio with silence in front and back and encode using AAC codec
-        subprocess.run('ffmpeg -y -hide_banner -loglevel error -i "{silence}" -i "{audio_in}" -i "{silence}" -filter_complex "[0:0][1:0][2:0]concat=n=3:v=0:a=1[a]" -map "[a]" -c:a aac -strict experimental "{audio_out}"'.format(silence=silence_file, audio_in=audio_file, audio_out=audio_file_padded), shell=True)
-    
+
     # Create video from slide image and synthesized audio
-    video_file = os.path.join(video_folder, f"video_{slide_number}.{container_format}")
-    slide_videos.append(video_file)
-    
     print(f"  Creating video of slide {slide_number} with synthesized audio and slide image")
-    subprocess.run('ffmpeg -y -hide_banner -loglevel error -loop 1 -i "{slide}" -i "{audio}" -c:v libx264 -framerate 5 -c:a copy -tune stillimage -shortest {video}'.format(slide=os.path.join(slide_folder, slide_image_file), audio=audio_file_padded, video=video_file), shell=True)
+    command = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-loop', '1', '-framerate', '5', '-i', slide_image_file]
+    if args.api == 'Azure':
+        # Audio is already padded with silence and compressed, copy it without re-encoding
+        command += ['-f', 'mp3', '-i', 'pipe:0' if audio_stream is not None else audio_file, *video_encoder_options, '-c:a', 'copy']
+    else: # SAPI
+        # Extend audio with generated silence in front and back and encode using AAC codec in the same pass
+        command += ['-f', 'lavfi', '-t', str(args.silence), '-i', 'anullsrc=r=11025:cl=mono', '-i', audio_file, '-filter_complex', '[1:a]asplit=2[s1][s2];[s1][2:a][s2]concat=n=3:v=0:a=1[a]', '-map', '0:v', '-map', '[a]', *video_encoder_options, '-c:a', 'aac']
+    command += ['-shortest', partial_video_file]
+    # Wait for a free slot, otherwise workers would keep starting encoders faster than they finish
+    encoder_slots.acquire()
+    process = None
+    try:
+        process = subprocess.Popen(command, stdin=subprocess.PIPE if audio_stream is not None else subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        watcher = encoder_watchers.submit(watch_encoder, process)
+    except BaseException:
+        # Without a watcher the slot would never be freed and other workers would wait for it forever
+        if process is not None:
+            process.kill()
+        encoder_slots.release()
+        raise
 
-# Close PowerPoint
-presentation.Close()
+    # Stop ffmpeg and remove its incomplete output; returns exit code and error output of ffmpeg
+    def discard_video():
+        process.kill()
+        if process.stdin is not None:
+            try:
+                process.stdin.close()
+            except OSError:
+                pass
+        result = watcher.result()
+        if os.path.exists(partial_video_file):
+            os.remove(partial_video_file)
+        return result
 
-# If no open presentations remaining - quit PowerPoint
-if args.quit_ppt and ppt.Presentations.Count == 0:
-    ppt.Quit()
+    if audio_stream is not None:
+        # Feed audio to ffmpeg while it is still being synthesized; keep a copy of the audio for reuse with --skip_audio
+        audio_buffer = bytes(32000)
+        try:
+            with open(audio_file, 'wb') as f:
+                while True:
+                    filled_size = audio_stream.read_data(audio_buffer)
+                    if filled_size == 0:
+                        break
+                    process.stdin.write(audio_buffer[:filled_size])
+                    f.write(audio_buffer[:filled_size])
+            process.stdin.close()
+        except OSError as e:
+            # ffmpeg exited before reading all audio, its error output tells why
+            _, error = discard_video()
+            worker.speech_synthesizer.stop_speaking_async().get()
+            print(f"  Creating video of slide {slide_number} failed: {error or e}")
+            return None
+        except BaseException:
+            # Any other error must stop ffmpeg as well, or it would wait for more audio forever
+            discard_video()
+            raise
+        if audio_stream.status == speechsdk.StreamStatus.Canceled:
+            discard_video()
+            print_cancellation_details(audio_stream.cancellation_details)
+            return None
+
+    # Do not wait for ffmpeg to finish encoding, so the worker can continue with synthesizing the next slide
+    pending.append((slide_number, watcher, partial_video_file, video_file, audio_hash, synthesize))
+    return video_file
+
+# Process slides in parallel, collecting the slide videos in slide order
+failed = False
+with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+    futures = [executor.submit(process_slide, slide_number, slide_text) for slide_number, slide_text in slide_texts.items()]
+    for future in futures:
+        try:
+            video_file = future.result()
+        except BaseException:
+            # Do not start processing of remaining slides, the error is raised once running slides are done
+            for pending_future in futures:
+                pending_future.cancel()
+            raise
+        if video_file is None:
+            # Slide failed, do not start processing of remaining slides
+            for pending_future in futures:
+                pending_future.cancel()
+            failed = True
+            break
+        slide_videos.append(video_file)
+
+# Wait for creation of slide videos to finish
+for slide_number, watcher, partial_video_file, video_file, audio_hash, synthesized in pending:
+    returncode, error = watcher.result()
+    if returncode != 0:
+        print(f"Creating video of slide {slide_number} failed: {error}")
+        if os.path.exists(partial_video_file):
+            os.remove(partial_video_file)
+        failed = True
+        continue
+    os.replace(partial_video_file, video_file)
+    if audio_hash:
+        # Remember what audio and video were created from, so unchanged slides can be skipped when updating
+        write_hash_file(os.path.join(audio_folder, f"audio_{slide_number}.hash"), audio_hash, video_settings)
+    if synthesized:
+        total_chars += len(slide_texts[slide_number])
+if failed:
+    # Do not create the full video from an incomplete set of slide videos
+    print("Not all slide videos could be created, exiting")
+    exit(1)
 
 if len(slide_videos) == 0:
     print(f"No slide videos {'updated' if args.update else 'created'}, exiting")
@@ -171,15 +433,21 @@ if not args.update:
         for slide_video in slide_videos:
             video_list_file.write(f"file '{slide_video}'\n")
 
-print("Creating full video by concatenating all slide videos")
-# Create temporary full video file
-temp_output_file = os.path.join(temp_dir, "__temp_video__." + container_format)
-subprocess.run(f'ffmpeg -y -hide_banner -loglevel error -f concat -safe 0 -i "{concat_file}" -c copy "{temp_output_file}"', shell=True)
+if not args.update and len(slide_videos) == 1:
+    # Nothing to concatenate, add poster image to the single slide video directly;
+    # the slide video is kept as is for reuse with --update
+    full_video_file = slide_videos[0]
+else:
+    print("Creating full video by concatenating all slide videos")
+    # Create temporary full video file
+    full_video_file = os.path.join(temp_dir, "__temp_video__." + container_format)
+    subprocess.run(['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', concat_file, '-c', 'copy', full_video_file])
 # Add poster image for final video
 poster_slide_file = os.path.join(slide_folder, f"slide_{args.poster_slide}.png")
-subprocess.run(f'ffmpeg -y -hide_banner -loglevel error -i "{temp_output_file}" -i "{poster_slide_file}" -map 0 -map 1 -c copy -c:v:1 png -disposition:v:1 attached_pic "{args.output}"', shell=True)
+subprocess.run(['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', full_video_file, '-i', poster_slide_file, '-map', '0', '-map', '1', '-c', 'copy', '-c:v:1', 'png', '-disposition:v:1', 'attached_pic', args.output])
 # Clean up
-os.remove(temp_output_file)
+if full_video_file not in slide_videos:
+    os.remove(full_video_file)
 
 print(f"Total characters synthesized: {total_chars}")
 print(f"Temporary files kept in {temp_dir}")